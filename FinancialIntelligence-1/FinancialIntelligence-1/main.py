@@ -1,8 +1,9 @@
 import streamlit as st
+import numpy as np
 import os
 import tempfile
-from utils.document_processor import process_document
-from utils.embeddings import generate_embeddings
+from utils.document_processor import process_document, split_sentences
+from utils.embeddings import generate_embeddings, build_index
 from utils.retriever import retrieve_context
 from utils.generator import generate_answer
 from utils.guardrails import input_validator, output_validator
@@ -19,6 +20,10 @@ if 'document_chunks' not in st.session_state:
     st.session_state.document_chunks = []
 if 'embeddings' not in st.session_state:
     st.session_state.embeddings = None
+if 'faiss_index' not in st.session_state:
+    st.session_state.faiss_index = None
+if 'chunk_sentences' not in st.session_state:
+    st.session_state.chunk_sentences = []
 if 'file_uploaded' not in st.session_state:
     st.session_state.file_uploaded = False
 if 'last_question' not in st.session_state:
@@ -60,8 +65,13 @@ with st.sidebar:
                 embeddings = generate_embeddings(chunks)
                 
                 # Store in session state
-                st.session_state.document_chunks = chunks
-                st.session_state.embeddings = embeddings
+                st.session_state.document_chunks = np.array(chunks, dtype=object)
+                faiss_index = build_index(embeddings)
+                
+                # The quantized index replaces the float32 matrix when available
+                st.session_state.embeddings = embeddings if faiss_index is None else None
+                st.session_state.faiss_index = faiss_index
+                st.session_state.chunk_sentences = [split_sentences(chunk) for chunk in chunks]
                 st.session_state.file_uploaded = True
                 
                 st.success(f"Document processed successfully! {len(chunks)} chunks generated.")
@@ -78,6 +88,8 @@ with st.sidebar:
         if st.button("Clear Document"):
             st.session_state.document_chunks = []
             st.session_state.embeddings = None
+            st.session_state.faiss_index = None
+            st.session_state.chunk_sentences = []
             st.session_state.file_uploaded = False
             st.session_state.last_question = ""
             st.session_state.last_answer = ""
@@ -104,11 +116,16 @@ if st.session_state.file_uploaded:
                 context, context_indices = retrieve_context(
                     question,
                     st.session_state.document_chunks,
-                    st.session_state.embeddings
+                    st.session_state.embeddings,
+                    index=st.session_state.faiss_index
                 )
                 
                 # Generate answer using the model
-                answer = generate_answer(question, context)
+                answer = generate_answer(
+                    question,
+                    context,
+                    context_sentences=[st.session_state.chunk_sentences[i] for i in context_indices]
+                )
                 
                 # Apply output guardrails
                 answer = output_validator(answer)
@@ -116,7 +133,7 @@ if st.session_state.file_uploaded:
                 # Store in session state
                 st.session_state.last_question = question
                 st.session_state.last_answer = answer
-                st.session_state.context_used = [st.session_state.document_chunks[i] for i in context_indices]
+                st.session_state.context_used = context
                 
         else:
             st.error(message)
@@ -1,16 +1,49 @@
+import multiprocessing
 import os
 import re
+import threading
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from io import StringIO
+from itertools import repeat
 
 # For PDF processing
+try:
+    import pypdfium2 as pdfium
+    from utils.pdf_worker import extract_pdfium_pages
+except ImportError:
+    # Fall back to the pure-Python extractors below
+    pdfium = None
+
 try:
     import PyPDF2
 except ImportError:
     # Fallback
     import pdfplumber
 
+# Minimum page count before PDF text extraction is spread across processes.
+# pdfium extracts a dense page in 3-5 ms, and starting the pool costs ~0.4 s,
+# so shorter documents are faster to extract in-process
+PARALLEL_MIN_PAGES = 300
+
+# Number of consecutive pages extracted by each worker task
+PAGES_PER_TASK = 16
+
+# Worker pool for parallel PDF extraction, started once per process
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+# Whitespace patterns normalized by clean_text
+MULTIPLE_NEWLINES = re.compile(r'\n{3,}')
+MULTIPLE_SPACES = re.compile(r' {2,}')
+SPACE_BEFORE_PUNCTUATION = re.compile(r'\s+([.,;:!?)])')
+SPACE_AFTER_BRACKET = re.compile(r'([({])\s+')
+
+# Whitespace following sentence-ending punctuation
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
 def process_document(file_path):
     """Process a document and split it into chunks for embedding.
     
@@ -46,24 +79,31 @@ def process_pdf(file_path, chunk_size=1000, overlap=200):
     Returns:
         list: List of text chunks from the PDF
     """
-    extracted_text = ""
+    extracted_text = None
     
-    try:
-        # Try PyPDF2 first
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                extracted_text += page.extract_text() + "\n\n"
-    except:
-        # Fallback to pdfplumber if PyPDF2 fails
+    # Try pypdfium2 first (native pdfium text extraction)
+    if pdfium is not None:
         try:
-            import pdfplumber
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    extracted_text += page.extract_text() + "\n\n"
-        except ImportError:
-            raise ImportError("Neither PyPDF2 nor pdfplumber is available. Install one of them.")
+            extracted_text = extract_pdf_text_pdfium(file_path)
+        except Exception as e:
+            print(f"Error extracting PDF text with pypdfium2: {str(e)}")
+    
+    if extracted_text is None:
+        try:
+            # Fallback to PyPDF2 if pypdfium2 is unavailable or fails
+            with open(file_path, 'rb') as file:
+                pdf_reader = PyPDF2.PdfReader(file)
+                page_texts = [page.extract_text() or "" for page in pdf_reader.pages]
+            extracted_text = "\n\n".join(page_texts)
+        except:
+            # Fallback to pdfplumber if PyPDF2 fails
+            try:
+                import pdfplumber
+                with pdfplumber.open(file_path) as pdf:
+                    page_texts = [page.extract_text() or "" for page in pdf.pages]
+                extracted_text = "\n\n".join(page_texts)
+            except ImportError:
+                raise ImportError("None of pypdfium2, PyPDF2 or pdfplumber is available. Install one of them.")
     
     # Clean up the text
     extracted_text = clean_text(extracted_text)
@@ -104,6 +144,62 @@ def process_pdf(file_path, chunk_size=1000, overlap=200):
     
     return chunks
 
+def extract_pdf_text_pdfium(file_path):
+    """Extract the text of every page of a PDF using pypdfium2.
+    
+    Long documents are split into page ranges that are extracted in
+    parallel by a worker pool shared across calls.
+    
+    Args:
+        file_path (str): Path to the PDF file
+        
+    Returns:
+        str: Text of all pages separated by blank lines
+    """
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        page_count = len(pdf)
+    finally:
+        pdf.close()
+    
+    workers = os.cpu_count() or 1
+    
+    if workers > 1 and page_count >= PARALLEL_MIN_PAGES:
+        starts = range(0, page_count, PAGES_PER_TASK)
+        stops = [min(start + PAGES_PER_TASK, page_count) for start in starts]
+        
+        # Each worker opens its own handle; map() keeps the page order
+        try:
+            batches = _get_pdf_pool(workers).map(extract_pdfium_pages, repeat(file_path), starts, stops)
+            page_texts = [text for batch in batches for text in batch]
+        except BrokenProcessPool:
+            _reset_pdf_pool()
+            raise
+    else:
+        page_texts = extract_pdfium_pages(file_path, 0, page_count)
+    
+    return "\n\n".join(page_texts)
+
+def _get_pdf_pool(workers):
+    """Return the process-wide PDF extraction pool, starting it on first use."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # Forking the multi-threaded server process can deadlock the child,
+            # so start workers from a clean interpreter instead
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            mp_context = multiprocessing.get_context(start_method)
+            _pdf_pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp_context)
+        return _pdf_pool
+
+def _reset_pdf_pool():
+    """Discard a broken PDF extraction pool so the next call starts a new one."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is not None:
+            _pdf_pool.shutdown()
+            _pdf_pool = None
+
 def process_csv(file_path, max_rows_per_chunk=50):
     """Process a CSV file and convert it into text chunks.
     
@@ -160,9 +256,6 @@ def dataframe_to_chunks(df, max_rows_per_chunk=50, sheet_name=None):
     chunks = []
     total_rows = len(df)
     
-    # Replace NaN values with empty strings
-    df = df.fillna('')
-    
     # Get column names and datatypes for schema information
     columns = df.columns.tolist()
     datatypes = df.dtypes.to_dict()
@@ -182,15 +275,27 @@ def dataframe_to_chunks(df, max_rows_per_chunk=50, sheet_name=None):
     
     chunks.append(schema_info)
     
+    # Serialize the whole frame once and slice the output by rows,
+    # writing NaN values as empty strings. to_csv picks one datetime format
+    # for the whole frame, so a column that only has times in later rows
+    # renders as full timestamps in every chunk
+    csv_lines = df.to_csv(index=False, na_rep='').split(os.linesep)
+    header, rows = csv_lines[0], csv_lines[1:-1]
+    
+    # Cells containing line breaks span several lines; slice the frame instead
+    one_line_per_row = len(rows) == total_rows
+    
     # Process data in chunks
     for i in range(0, total_rows, max_rows_per_chunk):
         end_idx = min(i + max_rows_per_chunk, total_rows)
-        chunk_df = df.iloc[i:end_idx]
         
         # Convert chunk to string
-        buffer = StringIO()
-        chunk_df.to_csv(buffer, index=False)
-        csv_str = buffer.getvalue()
+        if one_line_per_row:
+            csv_str = os.linesep.join([header] + rows[i:end_idx]) + os.linesep
+        else:
+            buffer = StringIO()
+            df.iloc[i:end_idx].to_csv(buffer, index=False, na_rep='')
+            csv_str = buffer.getvalue()
         
         # Add metadata to the chunk
         chunk_text = f"Data Rows {i+1} to {end_idx}"
@@ -212,13 +317,24 @@ def clean_text(text):
         str: Cleaned text
     """
     # Replace multiple newlines with double newline
-    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = MULTIPLE_NEWLINES.sub('\n\n', text)
     
     # Replace multiple spaces with single space
-    text = re.sub(r' {2,}', ' ', text)
+    text = MULTIPLE_SPACES.sub(' ', text)
     
     # Normalize whitespace around punctuation
-    text = re.sub(r'\s+([.,;:!?)])', r'\1', text)
-    text = re.sub(r'([({])\s+', r'\1', text)
+    text = SPACE_BEFORE_PUNCTUATION.sub(r'\1', text)
+    text = SPACE_AFTER_BRACKET.sub(r'\1', text)
     
     return text.strip()
+
+def split_sentences(text):
+    """Split text into sentences at whitespace following ., ! or ?.
+    
+    Args:
+        text (str): Text to split
+        
+    Returns:
+        list: List of sentences
+    """
+    return [sentence for sentence in SENTENCE_BOUNDARY.split(text) if sentence]
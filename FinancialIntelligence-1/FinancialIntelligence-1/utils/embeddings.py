@@ -1,23 +1,103 @@
+import functools
+import hashlib
 import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
 import os
+import tempfile
 
-def generate_embeddings(text_chunks, model_name="all-MiniLM-L6-v2"):
+# For approximate nearest-neighbour search
+try:
+    import faiss
+except ImportError:
+    # Fallback to brute-force numpy scoring in the retriever
+    faiss = None
+
+# For compiled brute-force scoring when numpy has no BLAS
+try:
+    from numba import njit, prange
+except ImportError:
+    # Fallback to numpy's own matrix-vector product
+    njit = None
+
+# Above this many chunks an HNSW graph beats an exact flat scan
+HNSW_MIN_CHUNKS = 100_000
+
+# Number of chunks encoded per forward pass
+ENCODE_BATCH_SIZE = 64
+
+# Directory for embeddings and indexes persisted across sessions. It has no
+# size bound or eviction: every uploaded document stays cached until the
+# directory is deleted by hand.
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache")
+
+def _numpy_has_blas():
+    """Report whether numpy was built against a BLAS library."""
+    try:
+        return bool(np.show_config(mode="dicts")["Build Dependencies"]["blas"]["found"])
+    except Exception:
+        # Assume BLAS if the build configuration can't be read
+        return True
+
+# BLAS matrix-vector products beat the Numba kernel, so it only runs without BLAS
+NUMPY_HAS_BLAS = _numpy_has_blas()
+
+@functools.lru_cache(maxsize=2)
+def _get_model(model_name):
+    """Load a sentence transformer model once per process and reuse it."""
+    model = SentenceTransformer(model_name)
+    
+    # Run in half precision on GPU for higher encode throughput
+    if torch.cuda.is_available():
+        model = model.to('cuda').half()
+    
+    return model
+
+@functools.lru_cache(maxsize=1024)
+def _encode_query_cached(model_name, query):
+    """Encode a query once and reuse the vector for repeated questions."""
+    embedding = np.asarray(_get_model(model_name).encode(query), dtype=np.float32)
+    embedding.setflags(write=False)
+    return embedding
+
+def generate_embeddings(text_chunks, model_name="all-MiniLM-L6-v2", cache_dir=CACHE_DIR):
     """Generate embeddings for a list of text chunks.
     
+    Embeddings are saved under cache_dir and returned memory-mapped, so the
+    same document uploaded again is read from disk instead of re-encoded.
+    Cache entries are never evicted, so cache_dir grows with every new document.
+    
     Args:
         text_chunks (list): List of text chunks to embed
         model_name (str): Name of the sentence transformer model to use
+        cache_dir (str, optional): Directory for cached embeddings, or None to disable caching
         
     Returns:
         numpy.ndarray: Array of embeddings for each chunk
     """
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f"emb_{_cache_key(text_chunks, model_name)}.npy")
+        cached = _load_cached_embeddings(cache_path)
+        if cached is not None:
+            return cached
+    
     try:
-        # Load the model (cache if already loaded)
-        model = SentenceTransformer(model_name)
+        # Load the model (cached after the first call)
+        model = _get_model(model_name)
         
-        # Generate embeddings
-        embeddings = model.encode(text_chunks, show_progress_bar=True)
+        # Generate L2-normalized embeddings so retrieval can score with a single dot product
+        embeddings = model.encode(
+            text_chunks,
+            batch_size=ENCODE_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        
+        if cache_path:
+            return _save_embeddings(embeddings, cache_path)
         
         return embeddings
     except Exception as e:
@@ -28,7 +108,115 @@ def generate_embeddings(text_chunks, model_name="all-MiniLM-L6-v2"):
             dim = model.get_sentence_embedding_dimension()
         except:
             dim = 384  # Default for all-MiniLM-L6-v2
-        return np.zeros((len(text_chunks), dim))
+        return np.zeros((len(text_chunks), dim), dtype=np.float32)
+
+def _cache_key(text_chunks, model_name):
+    """Hash the model name and chunk texts into a cache file key."""
+    hasher = hashlib.sha256(model_name.encode("utf-8"))
+    for chunk in text_chunks:
+        hasher.update(b"\0")
+        hasher.update(chunk.encode("utf-8"))
+    return hasher.hexdigest()
+
+def _load_cached_embeddings(cache_path):
+    """Memory-map cached embeddings, or return None if they aren't cached."""
+    if not os.path.exists(cache_path):
+        return None
+    
+    try:
+        return np.load(cache_path, mmap_mode="r")
+    except (OSError, ValueError, EOFError) as e:
+        print(f"Error loading cached embeddings: {str(e)}")
+        return None
+
+def _save_embeddings(embeddings, cache_path):
+    """Save embeddings to cache_path and return them memory-mapped from disk."""
+    tmp_path = None
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        
+        # Write to a uniquely named temporary file and rename it into place,
+        # since concurrent sessions share one process and can save the same key
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, embeddings)
+        os.replace(tmp_path, cache_path)
+        tmp_path = None
+        
+        return np.load(cache_path, mmap_mode="r")
+    except (OSError, ValueError, EOFError) as e:
+        print(f"Error caching embeddings: {str(e)}")
+        return embeddings
+    finally:
+        if tmp_path:
+            _remove_quietly(tmp_path)
+
+def _remove_quietly(path):
+    """Delete a leftover temporary file, ignoring errors."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def build_index(embeddings):
+    """Build a FAISS inner-product index over normalized embeddings.
+    
+    Vectors are stored as 8-bit scalar-quantized codes, a quarter of the
+    float32 size. Uses a flat scan for small collections and an HNSW graph
+    for large ones. For embeddings memory-mapped from the cache, the index
+    is saved next to them and read back on later calls.
+    
+    Args:
+        embeddings (numpy.ndarray): L2-normalized embeddings for each chunk
+        
+    Returns:
+        faiss.Index or None: Search index, or None if FAISS is unavailable
+    """
+    if faiss is None or embeddings is None or len(embeddings) == 0:
+        return None
+    
+    # Reuse an index persisted alongside cached embeddings
+    index_path = None
+    if isinstance(embeddings, np.memmap) and embeddings.filename:
+        index_path = os.path.splitext(embeddings.filename)[0] + ".faiss"
+        if os.path.exists(index_path):
+            try:
+                return faiss.read_index(index_path)
+            except Exception as e:
+                print(f"Error loading cached index: {str(e)}")
+    
+    try:
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        dim = embeddings.shape[1]
+        
+        if len(embeddings) < HNSW_MIN_CHUNKS:
+            index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexHNSWSQ(dim, faiss.ScalarQuantizer.QT_8bit, 32, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = 200
+        
+        # Learn the per-dimension quantization ranges, then encode
+        index.train(embeddings)
+        index.add(embeddings)
+    except Exception as e:
+        print(f"Error building index: {str(e)}")
+        return None
+    
+    if index_path:
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(index_path), suffix=".tmp")
+            os.close(fd)
+            faiss.write_index(index, tmp_path)
+            os.replace(tmp_path, index_path)
+            tmp_path = None
+        except Exception as e:
+            print(f"Error caching index: {str(e)}")
+        finally:
+            if tmp_path:
+                _remove_quietly(tmp_path)
+    
+    return index
 
 def embed_query(query, model_name="all-MiniLM-L6-v2"):
     """Generate embedding for a single query.
@@ -41,18 +229,15 @@ def embed_query(query, model_name="all-MiniLM-L6-v2"):
         numpy.ndarray: Embedding vector for the query
     """
     try:
-        # Load the model (cache if already loaded)
-        model = SentenceTransformer(model_name)
+        # Generate embedding (repeated questions skip the forward pass)
+        embedding = _encode_query_cached(model_name, query.strip())
         
-        # Generate embedding
-        embedding = model.encode(query)
-        
-        return embedding
+        return np.array(embedding)
     except Exception as e:
         print(f"Error embedding query: {str(e)}")
         # Return empty array with appropriate dimensions
         try:
-            dim = model.get_sentence_embedding_dimension()
+            dim = _get_model(model_name).get_sentence_embedding_dimension()
         except:
             dim = 384  # Default for all-MiniLM-L6-v2
         return np.zeros(dim)
@@ -80,3 +265,53 @@ def cosine_similarity(v1, v2):
         return 0.0
     
     return dot_product / (norm_v1 * norm_v2)
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _dot_scores(mat, q):
+        """Compute the dot product of every row of mat with q in parallel."""
+        n, d = mat.shape
+        sims = np.empty(n, dtype=np.float32)
+        for i in prange(n):
+            s = 0.0
+            for j in range(d):
+                s += mat[i, j] * q[j]
+            sims[i] = s
+        return sims
+else:
+    _dot_scores = None
+
+def topk_cosine(mat, q, k):
+    """Find the k rows of mat most similar to q.
+    
+    Both mat and q must be L2-normalized, so the dot product equals cosine
+    similarity. Scores with a BLAS matrix-vector product, or with a
+    Numba-compiled kernel when numpy was built without BLAS.
+    
+    Args:
+        mat (numpy.ndarray): Normalized embeddings, shape (N, d)
+        q (numpy.ndarray): Normalized query vector, shape (d,)
+        k (int): Number of rows to return
+        
+    Returns:
+        tuple: (indices, scores) ordered by descending similarity
+    """
+    mat = np.ascontiguousarray(mat, dtype=np.float32)
+    q = np.ascontiguousarray(q, dtype=np.float32)
+    
+    if _dot_scores is not None and not NUMPY_HAS_BLAS:
+        sims = _dot_scores(mat, q)
+    else:
+        sims = mat @ q
+    
+    # Partial selection of the top k in O(N), then order just those
+    k = min(k, len(sims))
+    if k <= 0:
+        top_idx = np.empty(0, dtype=np.intp)
+    elif k == len(sims):
+        top_idx = np.argsort(-sims)
+    else:
+        top_idx = np.argpartition(-sims, k - 1)[:k]
+        top_idx = top_idx[np.argsort(-sims[top_idx])]
+    
+    return top_idx, sims[top_idx]
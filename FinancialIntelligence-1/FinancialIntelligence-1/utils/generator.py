@@ -1,7 +1,9 @@
 import os
+import re
+from utils.document_processor import split_sentences
 from utils.retriever import augment_query_with_context
 
-def generate_answer(query, contexts, max_new_tokens=512, temperature=0.7):
+def generate_answer(query, contexts, max_new_tokens=512, temperature=0.7, context_sentences=None):
     """Generate an answer based on the retrieved contexts using a simple text-based approach.
     
     Since we don't have access to the DeepSeek R1 Qwen 1.5B model, this function creates
@@ -12,6 +14,7 @@ def generate_answer(query, contexts, max_new_tokens=512, temperature=0.7):
         contexts (list): List of relevant context chunks
         max_new_tokens (int): Maximum number of tokens to generate (not used in this implementation)
         temperature (float): Generation temperature (not used in this implementation)
+        context_sentences (list, optional): Pre-split sentences for each context
         
     Returns:
         str: Generated answer
@@ -35,20 +38,26 @@ def generate_answer(query, contexts, max_new_tokens=512, temperature=0.7):
         # Extract keywords from query
         keywords = [word for word in query_lower.split() if word not in stopwords]
         
+        # Match all keywords in a single pass over each text
+        keyword_pattern = None
+        if keywords:
+            keyword_pattern = re.compile("|".join(re.escape(keyword) for keyword in keywords), re.IGNORECASE)
+        
         # Generate a response based on the retrieved contexts and keywords
         relevant_sentences = []
+        seen_sentences = set()
         
-        for context in contexts:
-            context_lower = context.lower()
-            
+        # Split the contexts here only if they weren't split at ingest time
+        if context_sentences is None:
+            context_sentences = [split_sentences(context) for context in contexts]
+        
+        for context, sentences in zip(contexts, context_sentences):
             # Check if the context contains any of the keywords
-            if any(keyword in context_lower for keyword in keywords):
-                # Split the context into sentences (simple implementation)
-                sentences = context.split('. ')
-                
+            if keyword_pattern is not None and keyword_pattern.search(context):
                 for sentence in sentences:
-                    if any(keyword in sentence.lower() for keyword in keywords):
-                        if sentence not in relevant_sentences and len(sentence) > 10:
+                    if keyword_pattern.search(sentence):
+                        if sentence not in seen_sentences and len(sentence) > 10:
+                            seen_sentences.add(sentence)
                             relevant_sentences.append(sentence)
         
         # If we found relevant sentences, use them to build the answer
@@ -62,7 +71,7 @@ def generate_answer(query, contexts, max_new_tokens=512, temperature=0.7):
                     
                 # Clean the sentence
                 clean_sentence = sentence.strip()
-                if not clean_sentence.endswith('.'):
+                if not clean_sentence.endswith(('.', '!', '?')):
                     clean_sentence += '.'
                     
                 answer += clean_sentence
@@ -1,5 +1,57 @@
 import re
 
+# Patterns for potentially sensitive requests
+SENSITIVE_PATTERNS = [
+    r"\bpassword(s)?\b",
+    r"\bcredit\s*card(s)?\b",
+    r"\bsocial\s*security\b",
+    r"\bhack(ing)?\b",
+    r"\bexploit\b",
+    r"\battack\b",
+    r"\billegal\b",
+    r"\bunethical\b"
+]
+
+# Patterns for harmful content in answers
+HARMFUL_PATTERNS = [
+    r"\bhow\s+to\s+hack\b",
+    r"\bhow\s+to\s+exploit\b",
+    r"\bhow\s+to\s+attack\b",
+    r"\billegal\s+\w+\s+to\b",
+    r"\bunethical\s+\w+\s+to\b"
+]
+
+# Patterns for financially relevant terms
+FINANCIAL_TERMS = [
+    r"\bbalance\s*sheet\b",
+    r"\bincome\s*statement\b",
+    r"\bcash\s*flow\b",
+    r"\bfinancial\s*statement\b",
+    r"\bassets?\b",
+    r"\bliabilit(y|ies)\b",
+    r"\bequity\b",
+    r"\brevenue\b",
+    r"\bprofit\b",
+    r"\bloss\b",
+    r"\bexpenses?\b",
+    r"\btaxes?\b",
+    r"\bdividend\b",
+    r"\bearnings\b",
+    r"\bebitda\b",
+    r"\bratio\b",
+    r"\bmargin\b",
+    r"\bdebt\b",
+    r"\bq[1-4]\b",
+    r"\bfiscal\b",
+    r"\bquarter(ly)?\b",
+    r"\bannual\b"
+]
+
+# Each pattern list compiled into one alternation so a single scan covers all of them
+_SENSITIVE_RE = re.compile("|".join(f"(?:{p})" for p in SENSITIVE_PATTERNS), re.IGNORECASE)
+_HARMFUL_RE = re.compile("|".join(f"(?:{p})" for p in HARMFUL_PATTERNS), re.IGNORECASE)
+_FINANCIAL_RE = re.compile("|".join(f"(?:{p})" for p in FINANCIAL_TERMS), re.IGNORECASE)
+
 def input_validator(query):
     """Validate user input to prevent harmful queries.
     
@@ -18,20 +70,8 @@ def input_validator(query):
         return False, "Your question is too long. Please limit it to 500 characters."
     
     # Check for potentially sensitive requests
-    sensitive_patterns = [
-        r"\bpassword(s)?\b",
-        r"\bcredit\s*card(s)?\b",
-        r"\bsocial\s*security\b",
-        r"\bhack(ing)?\b",
-        r"\bexploit\b",
-        r"\battack\b",
-        r"\billegal\b",
-        r"\bunethical\b"
-    ]
-    
-    for pattern in sensitive_patterns:
-        if re.search(pattern, query, re.IGNORECASE):
-            return False, "Your question appears to be requesting sensitive or potentially harmful information."
+    if _SENSITIVE_RE.search(query):
+        return False, "Your question appears to be requesting sensitive or potentially harmful information."
     
     # Check specifically for financial document analysis appropriateness
     financial_query = check_financial_relevance(query)
@@ -54,17 +94,8 @@ def output_validator(answer):
         return "I couldn't generate a meaningful answer to your question. Please try rephrasing or ask a different question."
     
     # Check for harmful content
-    harmful_patterns = [
-        r"\bhow\s+to\s+hack\b",
-        r"\bhow\s+to\s+exploit\b",
-        r"\bhow\s+to\s+attack\b",
-        r"\billegal\s+\w+\s+to\b",
-        r"\bunethical\s+\w+\s+to\b"
-    ]
-    
-    for pattern in harmful_patterns:
-        if re.search(pattern, answer, re.IGNORECASE):
-            return "I apologize, but I cannot provide information that could be used for harmful purposes."
+    if _HARMFUL_RE.search(answer):
+        return "I apologize, but I cannot provide information that could be used for harmful purposes."
     
     # Check for disclaimers that might need to be added
     if "financial advice" in answer.lower() or "investment advice" in answer.lower():
@@ -97,33 +128,4 @@ def check_financial_relevance(text):
     Returns:
         bool: True if financially relevant, False otherwise
     """
-    financial_terms = [
-        r"\bbalance\s*sheet\b",
-        r"\bincome\s*statement\b",
-        r"\bcash\s*flow\b",
-        r"\bfinancial\s*statement\b",
-        r"\bassets?\b",
-        r"\bliabilit(y|ies)\b",
-        r"\bequity\b",
-        r"\brevenue\b",
-        r"\bprofit\b",
-        r"\bloss\b",
-        r"\bexpenses?\b",
-        r"\btaxes?\b",
-        r"\bdividend\b",
-        r"\bearnings\b",
-        r"\bebitda\b",
-        r"\bratio\b",
-        r"\bmargin\b",
-        r"\bdebt\b",
-        r"\bq[1-4]\b",
-        r"\bfiscal\b",
-        r"\bquarter(ly)?\b",
-        r"\bannual\b"
-    ]
-    
-    for pattern in financial_terms:
-        if re.search(pattern, text, re.IGNORECASE):
-            return True
-    
-    return False
+    return _FINANCIAL_RE.search(text) is not None
@@ -0,0 +1,30 @@
+import pypdfium2 as pdfium
+
+# Kept free of the pandas/PyPDF2/pdfplumber imports in document_processor,
+# since every extraction worker process imports this module on startup
+
+def extract_pdfium_pages(file_path, start, stop):
+    """Extract the text of pages [start, stop) of a PDF using pypdfium2.
+
+    Args:
+        file_path (str): Path to the PDF file
+        start (int): Index of the first page to extract
+        stop (int): Index one past the last page to extract
+
+    Returns:
+        list: Text of each page in the range
+    """
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        page_texts = []
+        for page_num in range(start, stop):
+            page = pdf[page_num]
+            textpage = page.get_textpage()
+            # pdfium separates lines with CRLF
+            page_texts.append(textpage.get_text_range().replace('\r\n', '\n'))
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+
+    return page_texts
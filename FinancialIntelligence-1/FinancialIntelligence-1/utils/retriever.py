@@ -1,41 +1,51 @@
 import numpy as np
-from utils.embeddings import embed_query, cosine_similarity
+from utils.embeddings import embed_query, topk_cosine
 
-def retrieve_context(query, documents, embeddings, top_k=3, similarity_threshold=0.2):
+def retrieve_context(query, documents, embeddings, top_k=3, similarity_threshold=0.2, index=None):
     """Retrieve relevant document chunks for a query.
     
     Args:
         query (str): User query
-        documents (list): List of document chunks
-        embeddings (numpy.ndarray): Precomputed embeddings for document chunks
+        documents (numpy.ndarray or list): Object array (or list) of document chunks
+        embeddings (numpy.ndarray): Precomputed embeddings for document chunks, used when index is None
         top_k (int): Number of top chunks to retrieve
         similarity_threshold (float): Minimum similarity score to consider
+        index (faiss.Index, optional): Prebuilt search index over the embeddings
         
     Returns:
         tuple: (list of contexts, list of context indices)
     """
-    if not documents or embeddings is None or len(documents) == 0:
+    if documents is None or len(documents) == 0 or (embeddings is None and index is None):
         return [], []
     
     # Embed the query
     query_embedding = embed_query(query)
     
-    # Calculate similarities
-    similarities = []
-    for i, doc_embedding in enumerate(embeddings):
-        similarity = cosine_similarity(query_embedding, doc_embedding)
-        similarities.append((i, similarity))
+    # Normalize the query so the dot product equals cosine similarity
+    q = np.asarray(query_embedding, dtype=np.float32)
+    q = q / max(np.linalg.norm(q), 1e-12)
     
-    # Sort by similarity (highest first)
-    similarities.sort(key=lambda x: x[1], reverse=True)
+    if index is not None:
+        # Search the prebuilt index (faiss rejects k <= 0)
+        k = min(top_k, index.ntotal)
+        if k <= 0:
+            return [], []
+        scores, ids = index.search(q.reshape(1, -1), k)
+        top_scores = [(int(i), float(score)) for i, score in zip(ids[0], scores[0]) if i != -1]
+    else:
+        # Brute-force scan over all chunks
+        top_idx, top_sims = topk_cosine(embeddings, q, top_k)
+        top_scores = [(int(i), float(score)) for i, score in zip(top_idx, top_sims)]
     
-    # Filter by threshold and get top_k
-    filtered_similarities = [(i, score) for i, score in similarities if score >= similarity_threshold]
-    top_similarities = filtered_similarities[:top_k]
+    # Filter by threshold
+    top_similarities = [(i, score) for i, score in top_scores if score >= similarity_threshold]
     
     # Extract contexts and their indices
     context_indices = [i for i, _ in top_similarities]
-    contexts = [documents[i] for i in context_indices]
+    if isinstance(documents, np.ndarray):
+        contexts = documents[np.asarray(context_indices, dtype=np.intp)].tolist()
+    else:
+        contexts = [documents[i] for i in context_indices]
     
     return contexts, context_indices
 